@@ -0,0 +1,242 @@
+import argparse
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Union
+
+from sqlalchemy import DateTime, Integer, String, Text, create_engine, delete, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column, sessionmaker
+
+from .config import settings
+from .database import SessionLocal, engine
+from .models import DesignVersion
+from .schemas import CompactionReport
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveBase(DeclarativeBase):
+    pass
+
+
+class ArchivedDesignVersion(ArchiveBase):
+    __tablename__ = "archived_design_versions"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    design_id: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    spec_text: Mapped[str] = mapped_column(Text, nullable=False)
+    output_json: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    version_num: Mapped[int] = mapped_column(Integer, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+StoredVersion = Union[DesignVersion, ArchivedDesignVersion]
+
+archive_connect_args = {"check_same_thread": False} if settings.archive_database_url.startswith("sqlite") else {}
+archive_engine = create_engine(settings.archive_database_url, connect_args=archive_connect_args)
+ArchiveSessionLocal = sessionmaker(bind=archive_engine, autocommit=False, autoflush=False)
+
+
+def init_archive() -> None:
+    ArchiveBase.metadata.create_all(bind=archive_engine)
+
+
+def get_archived_version(version_id: str) -> Optional[ArchivedDesignVersion]:
+    with ArchiveSessionLocal() as archive:
+        return archive.get(ArchivedDesignVersion, version_id)
+
+
+def list_archived_versions(design_id: str, after_version_num: int = 0) -> list[ArchivedDesignVersion]:
+    with ArchiveSessionLocal() as archive:
+        return list(
+            archive.scalars(
+                select(ArchivedDesignVersion)
+                .where(
+                    ArchivedDesignVersion.design_id == design_id,
+                    ArchivedDesignVersion.version_num > after_version_num,
+                )
+                .order_by(ArchivedDesignVersion.version_num)
+            ).all()
+        )
+
+
+def _hot_db_bytes() -> Optional[int]:
+    if engine.dialect.name != "sqlite":
+        return None
+    with engine.connect() as conn:
+        page_count = conn.exec_driver_sql("PRAGMA page_count").scalar() or 0
+        freelist_count = conn.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+        page_size = conn.exec_driver_sql("PRAGMA page_size").scalar() or 0
+    return (page_count - freelist_count) * page_size
+
+
+def _time_hot_queries(db: Session, repeats: int = 5) -> Optional[float]:
+    # Average ms for the latest-version and by-id lookups behind list_designs
+    # and _get_owned_version.
+    sample = db.scalars(select(DesignVersion).order_by(DesignVersion.created_at.desc()).limit(1)).first()
+    if not sample:
+        return None
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        db.scalars(
+            select(DesignVersion)
+            .where(DesignVersion.design_id == sample.design_id)
+            .order_by(DesignVersion.version_num.desc())
+            .limit(1)
+        ).first()
+        db.scalars(select(DesignVersion).where(DesignVersion.id == sample.id)).first()
+    return (time.perf_counter() - started) * 1000 / repeats
+
+
+def _compaction_candidates(db: Session, cutoff: datetime, keep_latest: int, limit: int) -> list[str]:
+    ranked = select(
+        DesignVersion.id.label("id"),
+        func.row_number()
+        .over(partition_by=DesignVersion.design_id, order_by=DesignVersion.version_num.desc())
+        .label("rank"),
+    ).subquery()
+    return list(
+        db.scalars(
+            select(DesignVersion.id)
+            .join(ranked, ranked.c.id == DesignVersion.id)
+            .where(
+                ranked.c.rank > keep_latest,
+                DesignVersion.created_at < cutoff,
+                DesignVersion.pinned.is_(False),
+            )
+            .order_by(DesignVersion.created_at)
+            .limit(limit)
+        ).all()
+    )
+
+
+def _vacuum_hot_db() -> None:
+    try:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql("VACUUM")
+    except OperationalError:
+        logger.warning("VACUUM of the hot database failed; freed pages stay on the freelist", exc_info=True)
+
+
+def compact_versions(now: Optional[datetime] = None, vacuum: Optional[bool] = None) -> CompactionReport:
+    started = time.perf_counter()
+    cutoff = (now or datetime.utcnow()) - timedelta(days=settings.archive_retention_days)
+    # The newest version always stays hot so version numbering in /generate
+    # never has to consult the archive.
+    keep_latest = max(1, settings.archive_keep_latest)
+    if vacuum is None:
+        vacuum = settings.archive_vacuum
+    bytes_before = _hot_db_bytes()
+    versions_archived = 0
+    bytes_moved = 0
+    hot_duplicates_removed = 0
+
+    with SessionLocal() as db, ArchiveSessionLocal() as archive:
+        query_ms_before = _time_hot_queries(db)
+        while True:
+            candidate_ids = _compaction_candidates(db, cutoff, keep_latest, settings.archive_batch_size)
+            if not candidate_ids:
+                break
+
+            # Re-check the pin and cutoff in the DELETE itself so a version
+            # pinned since the candidate query stays hot. The delete is only
+            # committed after the archive write; a crash in between leaves a
+            # duplicate that reads resolve in favour of the hot copy.
+            deleted = db.execute(
+                delete(DesignVersion)
+                .where(
+                    DesignVersion.id.in_(candidate_ids),
+                    DesignVersion.pinned.is_(False),
+                    DesignVersion.created_at < cutoff,
+                )
+                .returning(
+                    DesignVersion.id,
+                    DesignVersion.design_id,
+                    DesignVersion.spec_text,
+                    DesignVersion.output_json,
+                    DesignVersion.created_at,
+                    DesignVersion.version_num,
+                )
+                .execution_options(synchronize_session=False)
+            ).all()
+            already_archived = set(
+                archive.scalars(
+                    select(ArchivedDesignVersion.id).where(
+                        ArchivedDesignVersion.id.in_([row.id for row in deleted])
+                    )
+                ).all()
+            )
+            for row in deleted:
+                if row.id in already_archived:
+                    hot_duplicates_removed += 1
+                    continue
+                archive.add(
+                    ArchivedDesignVersion(
+                        id=row.id,
+                        design_id=row.design_id,
+                        spec_text=row.spec_text,
+                        output_json=row.output_json,
+                        created_at=row.created_at,
+                        version_num=row.version_num,
+                    )
+                )
+                versions_archived += 1
+                bytes_moved += len(row.spec_text) + len(row.output_json)
+            archive.commit()
+            db.commit()
+
+        if (versions_archived or hot_duplicates_removed) and vacuum and engine.dialect.name == "sqlite":
+            _vacuum_hot_db()
+        query_ms_after = _time_hot_queries(db)
+
+    bytes_after = _hot_db_bytes()
+    return CompactionReport(
+        versions_archived=versions_archived,
+        bytes_moved=bytes_moved,
+        hot_duplicates_removed=hot_duplicates_removed,
+        hot_db_bytes_before=bytes_before,
+        hot_db_bytes_after=bytes_after,
+        bytes_reclaimed=bytes_before - bytes_after if bytes_before is not None and bytes_after is not None else None,
+        hot_query_ms_before=query_ms_before,
+        hot_query_ms_after=query_ms_after,
+        duration_seconds=time.perf_counter() - started,
+    )
+
+
+def start_compaction_worker() -> None:
+    if settings.archive_interval_seconds <= 0:
+        return
+
+    def run() -> None:
+        while True:
+            time.sleep(settings.archive_interval_seconds)
+            try:
+                report = compact_versions()
+            except Exception:
+                logger.exception("Design version compaction failed")
+                continue
+            logger.info("Design version compaction finished: %s", report.model_dump_json())
+
+    threading.Thread(target=run, name="design-version-compaction", daemon=True).start()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move old design versions to the cold archive.")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the hot SQLite database afterwards")
+    args = parser.parse_args()
+
+    # Imported here: app.main imports this module for the read fall-through.
+    from .main import _ensure_pinned_column
+
+    _ensure_pinned_column()
+    init_archive()
+    print(compact_versions(vacuum=args.vacuum or None).model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Compare monolithic and decomposed generation latency on the example specs.
+
+Usage (from ``backend/``): ``python -m app.bench_generation --rounds 3`` against the
+configured backends, or add ``--stub`` for a local stub whose latency scales with output size.
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .config import LLMBackendSettings, settings
+from .example_specs import EXAMPLE_SPECS
+from .generator import generate_structured_design
+
+STUB_DESIGN = {
+    "services": [
+        {"name": f"{name}-service", "responsibility": f"Owns {name} data and workflows", "dependencies": ["auth-service"]}
+        for name in ["auth", "catalog", "orders", "payments", "notifications", "reporting"]
+    ],
+    "tables": [
+        {
+            "name": name,
+            "columns": [
+                {"name": "id", "type": "UUID", "constraints": ["PRIMARY KEY"]},
+                {"name": "owner_id", "type": "UUID", "constraints": ["NOT NULL"]},
+                {"name": "status", "type": "VARCHAR(32)", "constraints": ["NOT NULL"]},
+                {"name": "payload", "type": "JSONB"},
+                {"name": "created_at", "type": "TIMESTAMP", "constraints": ["NOT NULL"]},
+            ],
+        }
+        for name in ["users", "products", "orders", "order_items", "payments", "invoices", "notifications", "events"]
+    ],
+    "endpoints": [
+        {
+            "method": method,
+            "path": path,
+            "summary": f"{method} {path}",
+            "query_params": [{"name": "limit", "type": "integer"}] if method == "GET" else [],
+            "request_body_schema": {"type": "object"} if method == "POST" else {},
+            "response_schema": {"type": "object", "properties": {"id": {"type": "string"}}},
+        }
+        for resource in ["users", "products", "orders", "payments", "invoices", "notifications"]
+        for method, path in [("GET", f"/{resource}"), ("POST", f"/{resource}")]
+    ],
+    "sequence_steps": [
+        {"from_service": source, "to_service": target, "message": message, "is_async": is_async}
+        for source, target, message, is_async in [
+            ("client", "auth-service", "authenticate", False),
+            ("client", "orders-service", "create order", False),
+            ("orders-service", "catalog-service", "reserve inventory", False),
+            ("orders-service", "payments-service", "capture payment", False),
+            ("payments-service", "orders-service", "payment webhook", True),
+            ("orders-service", "notifications-service", "order confirmed", True),
+            ("notifications-service", "client", "send email", True),
+            ("orders-service", "reporting-service", "record order event", True),
+        ]
+    ],
+}
+
+# Prompt marker for each decomposed call, mapped to the part of STUB_DESIGN it returns.
+STUB_SECTIONS = {
+    "Outline the services": ["services"],
+    "database tables": ["tables"],
+    "HTTP endpoints": ["endpoints"],
+    "sequence_steps between": ["sequence_steps"],
+}
+
+
+def _start_stub(seconds_per_kb: float, overhead_seconds: float) -> LLMBackendSettings:
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args: object) -> None:
+            pass
+
+        def do_POST(self) -> None:
+            body = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))))
+            prompt = body["messages"][-1]["content"]
+            keys = next((keys for marker, keys in STUB_SECTIONS.items() if marker in prompt), list(STUB_DESIGN))
+            content = json.dumps({key: STUB_DESIGN[key] for key in keys})
+            # Model latency grows with the number of tokens generated.
+            time.sleep(overhead_seconds + seconds_per_kb * len(content) / 1024)
+            payload = json.dumps(
+                {
+                    "id": "stub",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": body["model"],
+                    "choices": [
+                        {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}
+                    ],
+                }
+            ).encode()
+            self.send_response(200)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return LLMBackendSettings(name="stub", base_url=f"http://{host}:{port}/v1", api_key="stub", model="stub", api="chat")
+
+
+def _time_generation(spec: str, decomposed: bool) -> float:
+    started = time.perf_counter()
+    generate_structured_design(spec, decomposed=decomposed)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--stub", action="store_true", help="benchmark against a local size-scaled stub backend")
+    parser.add_argument("--stub-seconds-per-kb", type=float, default=0.1)
+    parser.add_argument("--stub-overhead-seconds", type=float, default=0.05)
+    args = parser.parse_args()
+
+    if args.stub:
+        settings.llm_backends = [_start_stub(args.stub_seconds_per_kb, args.stub_overhead_seconds)]
+
+    totals: dict[str, list[float]] = {"monolithic": [], "decomposed": []}
+    print(f"{'spec':<28} {'monolithic':>12} {'decomposed':>12}")
+    for example in EXAMPLE_SPECS:
+        row: dict[str, float] = {}
+        for mode in totals:
+            samples = [_time_generation(example["spec"], mode == "decomposed") for _ in range(args.rounds)]
+            row[mode] = statistics.median(samples)
+            totals[mode].extend(samples)
+        print(f"{example['title']:<28} {row['monolithic']:>11.2f}s {row['decomposed']:>11.2f}s")
+
+    print(
+        f"{'median':<28} {statistics.median(totals['monolithic']):>11.2f}s "
+        f"{statistics.median(totals['decomposed']):>11.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
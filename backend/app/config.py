@@ -1,12 +1,44 @@
+from typing import Literal
+
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class LLMBackendSettings(BaseModel):
+    name: str
+    base_url: str = ""
+    api_key: str = ""
+    model: str = ""
+    api: Literal["responses", "chat"] = "responses"
+    timeout_seconds: float = 60.0
+
+
 class Settings(BaseSettings):
     app_name: str = "ArchCopilot API"
     database_url: str = "sqlite:///./archcopilot.db"
+    # Cold tier for compacted design versions. Versions older than the
+    # retention window move here, except the latest N per design and pinned ones.
+    archive_database_url: str = "sqlite:///./archcopilot_archive.db"
+    archive_retention_days: int = 30
+    archive_keep_latest: int = 5
+    archive_batch_size: int = 500
+    archive_interval_seconds: int = 0
+    archive_vacuum: bool = False
     openai_api_key: str = ""
     openai_model: str = "gpt-4o-mini"
 
+    # JSON list of OpenAI-compatible backends, tried in order. When empty, a
+    # single backend is built from openai_api_key / openai_model.
+    llm_backends: list[LLMBackendSettings] = []
+    llm_hedge_percentile: float = 0.95
+    llm_hedge_min_samples: int = 20
+    llm_hedge_default_delay_seconds: float = 10.0
+    llm_circuit_failure_threshold: int = 3
+    llm_circuit_reset_seconds: float = 30.0
+    # Generate a service outline first, then tables/endpoints/sequence steps
+    # concurrently instead of one monolithic completion.
+    llm_decomposed_generation: bool = False
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
 
@@ -1,13 +1,30 @@
+import asyncio
 import json
 import re
-from typing import Any
+from typing import Any, Optional, TypeVar
 
 import yaml
-from openai import OpenAI
-from pydantic import ValidationError
+from pydantic import BaseModel
 
 from .config import settings
-from .schemas import EndpointItem, LLMDesignOutput, RiskItem, SequenceStep, TableItem
+from .llm_backends import (
+    BackendClients,
+    LLMBackendError,
+    NoBackendAvailable,
+    configured_backends,
+    hedged_completion,
+)
+from .schemas import (
+    EndpointItem,
+    EndpointsSection,
+    LLMDesignOutput,
+    RiskItem,
+    SequenceSection,
+    SequenceStep,
+    ServiceOutline,
+    TableItem,
+    TablesSection,
+)
 
 
 SYSTEM_PROMPT = """You are a software architect assistant.
@@ -20,63 +37,125 @@ def _json_schema() -> dict[str, Any]:
     return LLMDesignOutput.model_json_schema()
 
 
-def generate_structured_design(spec: str) -> LLMDesignOutput:
-    if not settings.openai_api_key:
-        raise RuntimeError("OPENAI_API_KEY is required to generate designs.")
+ModelT = TypeVar("ModelT", bound=BaseModel)
 
-    client = OpenAI(api_key=settings.openai_api_key)
 
+async def _complete_with_retries(
+    clients: BackendClients, user_prompt: str, model: type[ModelT], label: str
+) -> ModelT:
+    last_error: Exception | None = None
+    for _ in range(3):  # first attempt + up to 2 retries
+        try:
+            return await hedged_completion(clients, label, SYSTEM_PROMPT, user_prompt, model.model_validate_json)
+        except NoBackendAvailable:
+            # Nothing was attempted; retrying straight away cannot help.
+            raise
+        except LLMBackendError as exc:
+            last_error = exc
+            continue
+
+    raise RuntimeError(f"Failed to get valid LLM JSON output for {label} after retries: {last_error}")
+
+
+async def _generate_monolithic(clients: BackendClients, spec: str) -> LLMDesignOutput:
     user_prompt = (
         "Convert the following product spec into architecture artifacts.\n"
         "Include services, tables, endpoints, and sequence_steps.\n"
         f"Product spec:\n{spec}\n\n"
         f"JSON schema:\n{json.dumps(_json_schema())}"
     )
+    return await _complete_with_retries(clients, user_prompt, LLMDesignOutput, "design")
+
 
-    def _extract_text_from_response_api(response: Any) -> str:
-        return (response.output_text or "").strip()
+def _section_prompt(spec: str, outline: ServiceOutline, instructions: str, model: type[BaseModel]) -> str:
+    return (
+        f"{instructions}\n"
+        "Use only the services from the outline below.\n"
+        f"Product spec:\n{spec}\n\n"
+        f"Service outline:\n{outline.model_dump_json()}\n\n"
+        f"JSON schema:\n{json.dumps(model.model_json_schema())}"
+    )
 
-    def _extract_text_from_chat_api(response: Any) -> str:
-        choices = getattr(response, "choices", None) or []
-        if not choices:
-            return ""
-        message = getattr(choices[0], "message", None)
-        if not message:
-            return ""
-        content = getattr(message, "content", "")
-        return content.strip() if isinstance(content, str) else ""
 
-    last_error: Exception | None = None
-    for _ in range(3):  # first attempt + up to 2 retries
-        if hasattr(client, "responses"):
-            response = client.responses.create(
-                model=settings.openai_model,
-                input=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0,
+async def _generate_decomposed(clients: BackendClients, spec: str) -> LLMDesignOutput:
+    # The outline is short, so the three larger sections can then be produced
+    # in parallel; each section retries on its own.
+    outline_prompt = (
+        "Outline the services for the following product spec.\n"
+        "Give each service a responsibility and its dependencies on other services.\n"
+        f"Product spec:\n{spec}\n\n"
+        f"JSON schema:\n{json.dumps(ServiceOutline.model_json_schema())}"
+    )
+    outline = await _complete_with_retries(clients, outline_prompt, ServiceOutline, "service outline")
+
+    # A TaskGroup cancels the sibling sections as soon as one runs out of
+    # retries, so none are still in flight when the shared clients close.
+    try:
+        async with asyncio.TaskGroup() as group:
+            tables_task = group.create_task(
+                _complete_with_retries(
+                    clients,
+                    _section_prompt(
+                        spec, outline, "Design the database tables that back these services.", TablesSection
+                    ),
+                    TablesSection,
+                    "tables",
+                )
             )
-            text = _extract_text_from_response_api(response)
-        else:
-            response = client.chat.completions.create(
-                model=settings.openai_model,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0,
-                response_format={"type": "json_object"},
+            endpoints_task = group.create_task(
+                _complete_with_retries(
+                    clients,
+                    _section_prompt(
+                        spec, outline, "Design the public HTTP endpoints exposed by these services.", EndpointsSection
+                    ),
+                    EndpointsSection,
+                    "endpoints",
+                )
             )
-            text = _extract_text_from_chat_api(response)
+            sequence_task = group.create_task(
+                _complete_with_retries(
+                    clients,
+                    _section_prompt(
+                        spec,
+                        outline,
+                        "Describe the main request flow as sequence_steps between these services.",
+                        SequenceSection,
+                    ),
+                    SequenceSection,
+                    "sequence_steps",
+                )
+            )
+    except ExceptionGroup as exc:
+        raise exc.exceptions[0]
+
+    tables = tables_task.result()
+    endpoints = endpoints_task.result()
+    sequence = sequence_task.result()
+
+    return LLMDesignOutput.model_validate(
+        {
+            "services": outline.services,
+            "tables": tables.tables,
+            "endpoints": endpoints.endpoints,
+            "sequence_steps": sequence.sequence_steps,
+        }
+    )
 
-        try:
-            return LLMDesignOutput.model_validate_json(text)
-        except ValidationError as exc:
-            last_error = exc
-            continue
 
-    raise RuntimeError(f"Failed to parse LLM JSON output after retries: {last_error}")
+async def _generate(spec: str, decomposed: bool) -> LLMDesignOutput:
+    async with BackendClients() as clients:
+        if decomposed:
+            return await _generate_decomposed(clients, spec)
+        return await _generate_monolithic(clients, spec)
+
+
+def generate_structured_design(spec: str, decomposed: Optional[bool] = None) -> LLMDesignOutput:
+    if not configured_backends():
+        raise RuntimeError("OPENAI_API_KEY or LLM_BACKENDS is required to generate designs.")
+
+    if decomposed is None:
+        decomposed = settings.llm_decomposed_generation
+    return asyncio.run(_generate(spec, decomposed))
 
 
 def build_sql_ddl(tables: list[TableItem]) -> str:
@@ -0,0 +1,330 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional, TypeVar
+
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, RateLimitError
+
+from .config import LLMBackendSettings, settings
+from .schemas import LLMBackendStats, LLMLatencyStats
+
+T = TypeVar("T")
+
+LATENCY_WINDOW = 200
+
+
+class LLMBackendError(RuntimeError):
+    pass
+
+
+class NoBackendAvailable(LLMBackendError):
+    pass
+
+
+class BackendState:
+    # Shared across requests on FastAPI's threadpool, hence the lock.
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        # Keyed by call kind: a short outline call and a full design have very
+        # different latencies, and one mixed window would skew the hedge delay.
+        self.latencies: dict[str, deque[float]] = {}
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.invalid_outputs = 0
+        self.rejected = 0
+        self.wins = 0
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.half_open_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < settings.llm_circuit_reset_seconds:
+                return False
+            if self.half_open_in_flight:
+                return False
+            self.half_open_in_flight = True
+            return True
+
+    def record_success(self, kind: str, latency: float) -> None:
+        with self._lock:
+            self.latencies.setdefault(kind, deque(maxlen=LATENCY_WINDOW)).append(latency)
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.half_open_in_flight = False
+
+    def record_failure(self, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.failures += 1
+            self.consecutive_failures += 1
+            if self.half_open_in_flight or self.consecutive_failures >= settings.llm_circuit_failure_threshold:
+                self.opened_at = time.monotonic()
+            self.half_open_in_flight = False
+
+    def record_invalid_output(self) -> None:
+        # The backend answered, so this says nothing about its health and
+        # must not feed the circuit breaker.
+        with self._lock:
+            self.invalid_outputs += 1
+
+    def record_rejected(self) -> None:
+        # 4xx responses depend on the request (e.g. context length), not on
+        # the backend's health, so they stay out of the circuit breaker too.
+        with self._lock:
+            self.rejected += 1
+            self.half_open_in_flight = False
+
+    def record_cancelled(self) -> None:
+        with self._lock:
+            self.cancelled += 1
+            self.half_open_in_flight = False
+
+    def record_win(self) -> None:
+        with self._lock:
+            self.wins += 1
+
+    def _samples(self, kind: str) -> list[float]:
+        with self._lock:
+            return sorted(self.latencies.get(kind, ()))
+
+    def percentile(self, kind: str, p: float) -> Optional[float]:
+        samples = self._samples(kind)
+        if not samples:
+            return None
+        rank = max(1, math.ceil(p * len(samples)))
+        return samples[rank - 1]
+
+    def hedge_delay(self, kind: str) -> float:
+        if len(self._samples(kind)) < settings.llm_hedge_min_samples:
+            return settings.llm_hedge_default_delay_seconds
+        return self.percentile(kind, settings.llm_hedge_percentile) or settings.llm_hedge_default_delay_seconds
+
+    def circuit_state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at < settings.llm_circuit_reset_seconds:
+                return "open"
+            return "half_open"
+
+    def snapshot(self) -> LLMBackendStats:
+        return LLMBackendStats(
+            name=self.name,
+            circuit=self.circuit_state(),
+            successes=self.successes,
+            failures=self.failures,
+            timeouts=self.timeouts,
+            cancelled=self.cancelled,
+            invalid_outputs=self.invalid_outputs,
+            rejected=self.rejected,
+            wins=self.wins,
+            latencies=[
+                LLMLatencyStats(
+                    kind=kind,
+                    samples=len(self._samples(kind)),
+                    p50_seconds=self.percentile(kind, 0.5),
+                    p95_seconds=self.percentile(kind, 0.95),
+                    p99_seconds=self.percentile(kind, 0.99),
+                    hedge_delay_seconds=self.hedge_delay(kind),
+                )
+                for kind in sorted(self.latencies)
+            ],
+        )
+
+
+_states: dict[str, BackendState] = {}
+_states_lock = threading.Lock()
+
+
+def _get_state(name: str) -> BackendState:
+    with _states_lock:
+        state = _states.get(name)
+        if state is None:
+            state = BackendState(name)
+            _states[name] = state
+        return state
+
+
+def configured_backends() -> list[LLMBackendSettings]:
+    if settings.llm_backends:
+        return [
+            backend.model_copy(
+                update={
+                    "api_key": backend.api_key or settings.openai_api_key,
+                    "model": backend.model or settings.openai_model,
+                }
+            )
+            for backend in settings.llm_backends
+        ]
+    if not settings.openai_api_key:
+        return []
+    return [LLMBackendSettings(name="openai", api_key=settings.openai_api_key, model=settings.openai_model)]
+
+
+def backend_stats() -> list[LLMBackendStats]:
+    return [_get_state(backend.name).snapshot() for backend in configured_backends()]
+
+
+def _extract_text_from_response_api(response: Any) -> str:
+    return (response.output_text or "").strip()
+
+
+def _extract_text_from_chat_api(response: Any) -> str:
+    choices = getattr(response, "choices", None) or []
+    if not choices:
+        return ""
+    message = getattr(choices[0], "message", None)
+    if not message:
+        return ""
+    content = getattr(message, "content", "")
+    return content.strip() if isinstance(content, str) else ""
+
+
+async def _complete(client: AsyncOpenAI, backend: LLMBackendSettings, system_prompt: str, user_prompt: str) -> str:
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+    if backend.api == "responses":
+        response = await client.responses.create(model=backend.model, input=messages, temperature=0)
+        return _extract_text_from_response_api(response)
+
+    response = await client.chat.completions.create(
+        model=backend.model,
+        messages=messages,
+        temperature=0,
+        response_format={"type": "json_object"},
+    )
+    return _extract_text_from_chat_api(response)
+
+
+class BackendClients:
+    # Clients hold connection pools bound to the running loop: use one of
+    # these per asyncio.run and close it before the loop ends.
+
+    def __init__(self) -> None:
+        self._clients: dict[str, AsyncOpenAI] = {}
+
+    def get(self, backend: LLMBackendSettings) -> AsyncOpenAI:
+        client = self._clients.get(backend.name)
+        if client is None:
+            # Retries are handled by hedging/failover across backends, not by the SDK.
+            client = AsyncOpenAI(
+                api_key=backend.api_key,
+                base_url=backend.base_url or None,
+                timeout=backend.timeout_seconds,
+                max_retries=0,
+            )
+            self._clients[backend.name] = client
+        return client
+
+    async def close(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+    async def __aenter__(self) -> "BackendClients":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+
+async def _attempt(
+    client: AsyncOpenAI,
+    backend: LLMBackendSettings,
+    state: BackendState,
+    kind: str,
+    system_prompt: str,
+    user_prompt: str,
+    parse: Callable[[str], T],
+) -> T:
+    started = time.monotonic()
+    try:
+        text = await asyncio.wait_for(
+            _complete(client, backend, system_prompt, user_prompt), backend.timeout_seconds
+        )
+    except asyncio.CancelledError:
+        state.record_cancelled()
+        raise
+    except (asyncio.TimeoutError, APIConnectionError, InternalServerError, RateLimitError) as exc:
+        state.record_failure(timed_out=isinstance(exc, asyncio.TimeoutError))
+        raise
+    except Exception:
+        state.record_rejected()
+        raise
+    state.record_success(kind, time.monotonic() - started)
+
+    try:
+        return parse(text)
+    except Exception:
+        state.record_invalid_output()
+        raise
+
+
+async def hedged_completion(
+    clients: BackendClients, kind: str, system_prompt: str, user_prompt: str, parse: Callable[[str], T]
+) -> T:
+    """Race configured backends and return the first output that ``parse`` accepts."""
+    remaining = configured_backends()
+    running: dict[asyncio.Task, tuple[BackendState, float]] = {}
+    last_error: Optional[BaseException] = None
+
+    def launch_next() -> bool:
+        while remaining:
+            backend = remaining.pop(0)
+            state = _get_state(backend.name)
+            if not state.allow_request():
+                continue
+            task = asyncio.create_task(
+                _attempt(clients.get(backend), backend, state, kind, system_prompt, user_prompt, parse)
+            )
+            running[task] = (state, time.monotonic())
+            return True
+        return False
+
+    launch_next()
+    try:
+        while running:
+            # Hedge: start the next backend once the newest attempt has run
+            # past its hedge delay for this kind of call.
+            timeout: Optional[float] = None
+            if remaining:
+                newest_state, launched_at = list(running.values())[-1]
+                timeout = max(0.0, newest_state.hedge_delay(kind) - (time.monotonic() - launched_at))
+
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch_next()
+                continue
+
+            for task in done:
+                state, _ = running.pop(task)
+                error = task.exception()
+                if error is None:
+                    state.record_win()
+                    return task.result()
+                last_error = error
+
+            # Failed attempts (including rejected output) fail over right away.
+            launch_next()
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    if last_error is None:
+        raise NoBackendAvailable("No LLM backend available: all circuits are open.")
+    raise LLMBackendError(f"All LLM backends failed: {last_error!r}") from last_error
@@ -1,12 +1,21 @@
 import json
 from uuid import uuid4
-from typing import Any, Optional
+from typing import Any, Iterator, Optional, Union
 
 from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import func, inspect, select, text
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row, func, inspect, select, text
 from sqlalchemy.orm import Session
 
+from .archive import (
+    ArchivedDesignVersion,
+    StoredVersion,
+    get_archived_version,
+    init_archive,
+    list_archived_versions,
+    start_compaction_worker,
+)
 from .database import Base, engine, get_db
 from .example_specs import EXAMPLE_SPECS
 from .generator import (
@@ -16,6 +25,7 @@ from .generator import (
     generate_structured_design,
     run_risk_rules,
 )
+from .llm_backends import backend_stats
 from .models import Design, DesignVersion
 from .schemas import (
     DesignListItem,
@@ -24,8 +34,17 @@ from .schemas import (
     GenerateRequest,
     GenerateResponse,
     GeneratedArtifacts,
+    LLMBackendStats,
+    TimelineEntry,
     VersionListItem,
 )
+from .timeline import (
+    TimelineState,
+    artifact_signature,
+    diff_signatures,
+    summarize_version,
+    timeline_cache,
+)
 
 app = FastAPI(title="ArchCopilot API")
 VIEWER_COOKIE_NAME = "viewer_id"
@@ -43,6 +62,9 @@ app.add_middleware(
 def on_startup() -> None:
     Base.metadata.create_all(bind=engine)
     _ensure_owner_column()
+    _ensure_pinned_column()
+    init_archive()
+    start_compaction_worker()
 
 
 def _ensure_owner_column() -> None:
@@ -57,6 +79,17 @@ def _ensure_owner_column() -> None:
         conn.execute(text("CREATE INDEX IF NOT EXISTS ix_designs_owner_id ON designs (owner_id)"))
 
 
+def _ensure_pinned_column() -> None:
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        if not inspector.has_table("design_versions"):
+            return
+        column_names = {column["name"] for column in inspector.get_columns("design_versions")}
+        if "pinned" in column_names:
+            return
+        conn.execute(text("ALTER TABLE design_versions ADD COLUMN pinned BOOLEAN NOT NULL DEFAULT 0"))
+
+
 def get_viewer_id(request: Request, response: Response) -> str:
     viewer_id = request.cookies.get(VIEWER_COOKIE_NAME)
     if viewer_id:
@@ -80,12 +113,30 @@ def _get_owned_design(db: Session, design_id: str, viewer_id: str) -> Optional[D
     ).first()
 
 
-def _get_owned_version(db: Session, version_id: str, viewer_id: str) -> Optional[DesignVersion]:
-    return db.scalars(
+def _get_owned_version(db: Session, version_id: str, viewer_id: str) -> Optional[StoredVersion]:
+    version = db.scalars(
         select(DesignVersion)
         .join(Design, DesignVersion.design_id == Design.id)
         .where(DesignVersion.id == version_id, Design.owner_id == viewer_id)
     ).first()
+    if version:
+        return version
+
+    archived = get_archived_version(version_id)
+    if archived and _get_owned_design(db, archived.design_id, viewer_id):
+        return archived
+    return None
+
+
+def _version_list_item(version: StoredVersion) -> VersionListItem:
+    return VersionListItem(
+        id=version.id,
+        design_id=version.design_id,
+        version_num=version.version_num,
+        created_at=version.created_at,
+        pinned=isinstance(version, DesignVersion) and version.pinned,
+        archived=isinstance(version, ArchivedDesignVersion),
+    )
 
 
 def _to_artifacts(spec_text: str, output_json: str) -> GeneratedArtifacts:
@@ -96,7 +147,7 @@ def _to_artifacts(spec_text: str, output_json: str) -> GeneratedArtifacts:
     return artifacts
 
 
-def _version_to_response(version: DesignVersion) -> DesignVersionResponse:
+def _version_to_response(version: StoredVersion) -> DesignVersionResponse:
     artifacts = _to_artifacts(version.spec_text, version.output_json)
     return DesignVersionResponse(
         id=version.id,
@@ -118,6 +169,11 @@ def examples() -> list[dict[str, str]]:
     return EXAMPLE_SPECS
 
 
+@app.get("/llm_backends", response_model=list[LLMBackendStats])
+def llm_backends() -> list[LLMBackendStats]:
+    return backend_stats()
+
+
 @app.post("/generate", response_model=GenerateResponse)
 def generate(
     payload: GenerateRequest,
@@ -182,20 +238,13 @@ def list_versions(
     if not design:
         raise HTTPException(status_code=404, detail="Design not found")
 
-    versions = db.scalars(
-        select(DesignVersion)
-        .where(DesignVersion.design_id == design.id)
-        .order_by(DesignVersion.version_num.desc())
-    ).all()
-    return [
-        VersionListItem(
-            id=v.id,
-            design_id=v.design_id,
-            version_num=v.version_num,
-            created_at=v.created_at,
-        )
-        for v in versions
-    ]
+    versions: list[StoredVersion] = list(
+        db.scalars(select(DesignVersion).where(DesignVersion.design_id == design.id)).all()
+    )
+    hot_ids = {v.id for v in versions}
+    versions.extend(v for v in list_archived_versions(design.id) if v.id not in hot_ids)
+    versions.sort(key=lambda v: v.version_num, reverse=True)
+    return [_version_list_item(v) for v in versions]
 
 
 @app.get("/designs", response_model=list[DesignListItem])
@@ -244,8 +293,46 @@ def get_version(
     return _version_to_response(version)
 
 
-def _api_sig(path: str, method: str) -> str:
-    return f"{method.upper()} {path}"
+@app.post("/design_versions/{version_id}/pin", response_model=VersionListItem)
+def pin_version(
+    version_id: str,
+    viewer_id: str = Depends(get_viewer_id),
+    db: Session = Depends(get_db),
+) -> VersionListItem:
+    version = _get_owned_version(db, version_id, viewer_id)
+    if not version:
+        raise HTTPException(status_code=404, detail="Version not found")
+
+    if isinstance(version, ArchivedDesignVersion):
+        # The archive is append-only; the restored hot copy shadows it.
+        version = DesignVersion(
+            id=version.id,
+            design_id=version.design_id,
+            spec_text=version.spec_text,
+            output_json=version.output_json,
+            created_at=version.created_at,
+            version_num=version.version_num,
+        )
+        db.add(version)
+    version.pinned = True
+    db.commit()
+    return _version_list_item(version)
+
+
+@app.delete("/design_versions/{version_id}/pin", response_model=VersionListItem)
+def unpin_version(
+    version_id: str,
+    viewer_id: str = Depends(get_viewer_id),
+    db: Session = Depends(get_db),
+) -> VersionListItem:
+    version = _get_owned_version(db, version_id, viewer_id)
+    if not version:
+        raise HTTPException(status_code=404, detail="Version not found")
+
+    if isinstance(version, DesignVersion):
+        version.pinned = False
+        db.commit()
+    return _version_list_item(version)
 
 
 @app.get("/design_versions/{version_id}/diff", response_model=DiffSummary)
@@ -262,26 +349,58 @@ def diff_versions(
 
     current_artifacts = _to_artifacts(current.spec_text, current.output_json)
     previous_artifacts = _to_artifacts(previous.spec_text, previous.output_json)
+    return diff_signatures(artifact_signature(current_artifacts), artifact_signature(previous_artifacts))
 
-    curr_services = {s.name for s in current_artifacts.services}
-    prev_services = {s.name for s in previous_artifacts.services}
 
-    curr_apis = {_api_sig(ep.path, ep.method) for ep in current_artifacts.endpoints}
-    prev_apis = {_api_sig(ep.path, ep.method) for ep in previous_artifacts.endpoints}
+def _stream_timeline(
+    design_id: str, state: TimelineState, rows: list[Union[Row, ArchivedDesignVersion]]
+) -> Iterator[str]:
+    for line in state.lines:
+        yield line
 
-    curr_tables = {t.name for t in current_artifacts.tables}
-    prev_tables = {t.name for t in previous_artifacts.tables}
+    for row in rows:
+        artifacts = _to_artifacts(row.spec_text, row.output_json)
+        signature = artifact_signature(artifacts)
+        entry = TimelineEntry(
+            version=summarize_version(row.id, row.version_num, row.created_at, artifacts),
+            diff=diff_signatures(signature, state.last_signature) if state.last_signature else None,
+        )
+        line = entry.model_dump_json() + "\n"
+        state.lines.append(line)
+        state.last_version_num = row.version_num
+        state.last_signature = signature
+        yield line
 
-    curr_risks = {r.code for r in current_artifacts.risks}
-    prev_risks = {r.code for r in previous_artifacts.risks}
+    timeline_cache.put(design_id, state)
 
-    return DiffSummary(
-        services_added=sorted(curr_services - prev_services),
-        services_removed=sorted(prev_services - curr_services),
-        apis_added=sorted(curr_apis - prev_apis),
-        apis_removed=sorted(prev_apis - curr_apis),
-        tables_added=sorted(curr_tables - prev_tables),
-        tables_removed=sorted(prev_tables - curr_tables),
-        risks_added=sorted(curr_risks - prev_risks),
-        risks_removed=sorted(prev_risks - curr_risks),
-    )
+
+@app.get("/designs/{design_id}/timeline")
+def design_timeline(
+    design_id: str,
+    viewer_id: str = Depends(get_viewer_id),
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    # NDJSON TimelineEntry lines, oldest first; only versions newer than the
+    # cached timeline are read and decoded.
+    design = _get_owned_design(db, design_id, viewer_id)
+    if not design:
+        raise HTTPException(status_code=404, detail="Design not found")
+
+    state = timeline_cache.get(design.id)
+    rows: list[Union[Row, ArchivedDesignVersion]] = list(db.execute(
+        select(
+            DesignVersion.id,
+            DesignVersion.version_num,
+            DesignVersion.created_at,
+            DesignVersion.spec_text,
+            DesignVersion.output_json,
+        )
+        .where(DesignVersion.design_id == design.id, DesignVersion.version_num > state.last_version_num)
+        .order_by(DesignVersion.version_num)
+    ).all())
+    hot_ids = {row.id for row in rows}
+    archived = list_archived_versions(design.id, after_version_num=state.last_version_num)
+    if archived:
+        rows.extend(v for v in archived if v.id not in hot_ids)
+        rows.sort(key=lambda row: row.version_num)
+    return StreamingResponse(_stream_timeline(design.id, state, rows), media_type="application/x-ndjson")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any
+from typing import Any, Optional
 
 from pydantic import BaseModel, Field
 
@@ -50,6 +50,22 @@ class LLMDesignOutput(BaseModel):
     sequence_steps: list[SequenceStep]
 
 
+class ServiceOutline(BaseModel):
+    services: list[ServiceItem]
+
+
+class TablesSection(BaseModel):
+    tables: list[TableItem]
+
+
+class EndpointsSection(BaseModel):
+    endpoints: list[EndpointItem]
+
+
+class SequenceSection(BaseModel):
+    sequence_steps: list[SequenceStep]
+
+
 class RiskItem(BaseModel):
     code: str
     severity: str
@@ -91,6 +107,8 @@ class VersionListItem(BaseModel):
     design_id: str
     version_num: int
     created_at: datetime
+    pinned: bool = False
+    archived: bool = False
 
 
 class DesignListItem(BaseModel):
@@ -111,3 +129,54 @@ class DiffSummary(BaseModel):
     tables_removed: list[str]
     risks_added: list[str]
     risks_removed: list[str]
+
+
+class VersionSummary(BaseModel):
+    version_id: str
+    version_num: int
+    created_at: datetime
+    services: int
+    tables: int
+    endpoints: int
+    sequence_steps: int
+    risks: int
+    risk_counts: dict[str, int]
+
+
+class TimelineEntry(BaseModel):
+    version: VersionSummary
+    diff: Optional[DiffSummary] = None
+
+
+class LLMLatencyStats(BaseModel):
+    kind: str
+    samples: int
+    p50_seconds: Optional[float] = None
+    p95_seconds: Optional[float] = None
+    p99_seconds: Optional[float] = None
+    hedge_delay_seconds: float
+
+
+class LLMBackendStats(BaseModel):
+    name: str
+    circuit: str
+    successes: int
+    failures: int
+    timeouts: int
+    cancelled: int
+    invalid_outputs: int
+    rejected: int
+    wins: int
+    latencies: list[LLMLatencyStats]
+
+
+class CompactionReport(BaseModel):
+    versions_archived: int
+    bytes_moved: int
+    hot_duplicates_removed: int = 0
+    hot_db_bytes_before: Optional[int] = None
+    hot_db_bytes_after: Optional[int] = None
+    bytes_reclaimed: Optional[int] = None
+    hot_query_ms_before: Optional[float] = None
+    hot_query_ms_after: Optional[float] = None
+    duration_seconds: float
@@ -0,0 +1,97 @@
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from .schemas import DiffSummary, GeneratedArtifacts, VersionSummary
+
+TIMELINE_CACHE_SIZE = 256
+
+
+@dataclass(frozen=True)
+class ArtifactSignature:
+    services: frozenset[str]
+    apis: frozenset[str]
+    tables: frozenset[str]
+    risks: frozenset[str]
+
+
+def api_sig(path: str, method: str) -> str:
+    return f"{method.upper()} {path}"
+
+
+def artifact_signature(artifacts: GeneratedArtifacts) -> ArtifactSignature:
+    return ArtifactSignature(
+        services=frozenset(s.name for s in artifacts.services),
+        apis=frozenset(api_sig(ep.path, ep.method) for ep in artifacts.endpoints),
+        tables=frozenset(t.name for t in artifacts.tables),
+        risks=frozenset(r.code for r in artifacts.risks),
+    )
+
+
+def diff_signatures(current: ArtifactSignature, previous: ArtifactSignature) -> DiffSummary:
+    return DiffSummary(
+        services_added=sorted(current.services - previous.services),
+        services_removed=sorted(previous.services - current.services),
+        apis_added=sorted(current.apis - previous.apis),
+        apis_removed=sorted(previous.apis - current.apis),
+        tables_added=sorted(current.tables - previous.tables),
+        tables_removed=sorted(previous.tables - current.tables),
+        risks_added=sorted(current.risks - previous.risks),
+        risks_removed=sorted(previous.risks - current.risks),
+    )
+
+
+def summarize_version(
+    version_id: str, version_num: int, created_at: datetime, artifacts: GeneratedArtifacts
+) -> VersionSummary:
+    return VersionSummary(
+        version_id=version_id,
+        version_num=version_num,
+        created_at=created_at,
+        services=len(artifacts.services),
+        tables=len(artifacts.tables),
+        endpoints=len(artifacts.endpoints),
+        sequence_steps=len(artifacts.sequence_steps),
+        risks=len(artifacts.risks),
+        risk_counts=dict(Counter(r.severity for r in artifacts.risks)),
+    )
+
+
+@dataclass
+class TimelineState:
+    lines: list[str] = field(default_factory=list)
+    last_version_num: int = 0
+    last_signature: Optional[ArtifactSignature] = None
+
+
+class TimelineCache:
+    # Versions are immutable, so a cached prefix stays valid and is only
+    # extended with versions newer than last_version_num.
+
+    def __init__(self, max_designs: int = TIMELINE_CACHE_SIZE) -> None:
+        self._max_designs = max_designs
+        self._states: OrderedDict[str, TimelineState] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, design_id: str) -> TimelineState:
+        with self._lock:
+            state = self._states.get(design_id)
+            if state is None:
+                return TimelineState()
+            self._states.move_to_end(design_id)
+            return TimelineState(list(state.lines), state.last_version_num, state.last_signature)
+
+    def put(self, design_id: str, state: TimelineState) -> None:
+        with self._lock:
+            existing = self._states.get(design_id)
+            if existing and existing.last_version_num >= state.last_version_num:
+                return
+            self._states[design_id] = state
+            self._states.move_to_end(design_id)
+            while len(self._states) > self._max_designs:
+                self._states.popitem(last=False)
+
+
+timeline_cache = TimelineCache()
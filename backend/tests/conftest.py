@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Point both tiers at throwaway SQLite files before the engines are created.
+_db_dir = tempfile.mkdtemp(prefix="archcopilot-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/hot.db"
+os.environ["ARCHIVE_DATABASE_URL"] = f"sqlite:///{_db_dir}/archive.db"
+
+from app import llm_backends  # noqa: E402
+from app.archive import ArchiveBase, archive_engine  # noqa: E402
+from app.config import LLMBackendSettings, settings  # noqa: E402
+from app.database import Base, engine  # noqa: E402
+
+
+class StubBackend:
+    """Local OpenAI-compatible ``/chat/completions`` server with scriptable replies."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.delay = 0.0
+        self.status = 200
+        self.reply: Callable[[str], str] = lambda prompt: "{}"
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args: object) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                body = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))))
+                stub.requests += 1
+                time.sleep(stub.delay)
+                content = stub.reply(body["messages"][-1]["content"])
+                payload = json.dumps(
+                    {
+                        "id": "stub",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": body["model"],
+                        "choices": [
+                            {
+                                "index": 0,
+                                "finish_reason": "stop",
+                                "message": {"role": "assistant", "content": content},
+                            }
+                        ],
+                    }
+                ).encode()
+                try:
+                    self.send_response(stub.status)
+                    self.send_header("content-type", "application/json")
+                    self.send_header("content-length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except OSError:
+                    pass  # the client cancelled this request
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def settings(self) -> LLMBackendSettings:
+        host, port = self._server.server_address
+        return LLMBackendSettings(
+            name=self.name, base_url=f"http://{host}:{port}/v1", api_key="stub", model="stub", api="chat"
+        )
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def _reset_backend_state(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setattr(llm_backends, "_states", {})
+    monkeypatch.setattr(settings, "llm_hedge_default_delay_seconds", 0.2)
+    monkeypatch.setattr(settings, "llm_circuit_failure_threshold", 2)
+    monkeypatch.setattr(settings, "llm_circuit_reset_seconds", 0.3)
+    yield
+
+
+@pytest.fixture
+def stub_backends(monkeypatch: pytest.MonkeyPatch) -> Iterator[Callable[..., list[StubBackend]]]:
+    created: list[StubBackend] = []
+
+    def make(*names: str) -> list[StubBackend]:
+        stubs = [StubBackend(name) for name in names]
+        created.extend(stubs)
+        monkeypatch.setattr(settings, "llm_backends", [stub.settings for stub in stubs])
+        return stubs
+
+    yield make
+    for stub in created:
+        stub.close()
+
+
+@pytest.fixture
+def fresh_databases() -> None:
+    for base, bind in ((Base, engine), (ArchiveBase, archive_engine)):
+        base.metadata.drop_all(bind=bind)
+        base.metadata.create_all(bind=bind)
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app import archive
+from app.archive import ArchivedDesignVersion, ArchiveSessionLocal, compact_versions
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models import Design, DesignVersion
+
+
+@pytest.fixture(autouse=True)
+def _archive_policy(fresh_databases, monkeypatch):
+    monkeypatch.setattr(settings, "archive_retention_days", 30)
+    monkeypatch.setattr(settings, "archive_keep_latest", 2)
+
+
+def _make_design(version_count: int) -> list[str]:
+    with SessionLocal() as db:
+        design = Design(owner_id="viewer")
+        db.add(design)
+        db.flush()
+        versions = [
+            DesignVersion(
+                design_id=design.id,
+                spec_text="spec",
+                output_json="{}",
+                version_num=num,
+                created_at=datetime.utcnow() - timedelta(days=100 - num),
+            )
+            for num in range(1, version_count + 1)
+        ]
+        db.add_all(versions)
+        db.commit()
+        return [v.id for v in versions]
+
+
+def _hot_ids() -> set[str]:
+    with SessionLocal() as db:
+        return set(db.scalars(select(DesignVersion.id)).all())
+
+
+def _archived_ids() -> set[str]:
+    with ArchiveSessionLocal() as session:
+        return set(session.scalars(select(ArchivedDesignVersion.id)).all())
+
+
+def test_keeps_latest_and_pinned_versions_hot():
+    ids = _make_design(6)
+    with SessionLocal() as db:
+        db.get(DesignVersion, ids[0]).pinned = True
+        db.commit()
+
+    report = compact_versions()
+
+    assert report.versions_archived == 3
+    assert report.bytes_moved == 3 * len("spec{}")
+    assert _hot_ids() == {ids[0], ids[4], ids[5]}
+    assert _archived_ids() == set(ids[1:4])
+
+
+def test_version_pinned_after_selection_stays_hot(monkeypatch):
+    ids = _make_design(4)
+    select_candidates = archive._compaction_candidates
+
+    def pin_after_selecting(*args, **kwargs):
+        candidates = select_candidates(*args, **kwargs)
+        if candidates:
+            with SessionLocal() as db:
+                db.get(DesignVersion, ids[0]).pinned = True
+                db.commit()
+        return candidates
+
+    monkeypatch.setattr(archive, "_compaction_candidates", pin_after_selecting)
+
+    report = compact_versions()
+
+    assert report.versions_archived == 1
+    assert ids[0] in _hot_ids()
+    assert _archived_ids() == {ids[1]}
+
+
+def test_hot_duplicate_is_not_counted_as_moved():
+    ids = _make_design(3)
+    compact_versions()
+    assert _archived_ids() == {ids[0]}
+
+    # Pin restores a hot copy of an archived version; unpinning lets it compact again.
+    with ArchiveSessionLocal() as session:
+        archived = session.get(ArchivedDesignVersion, ids[0])
+    with SessionLocal() as db:
+        db.add(
+            DesignVersion(
+                id=archived.id,
+                design_id=archived.design_id,
+                spec_text=archived.spec_text,
+                output_json=archived.output_json,
+                created_at=archived.created_at,
+                version_num=archived.version_num,
+            )
+        )
+        db.commit()
+
+    report = compact_versions()
+
+    assert report.versions_archived == 0
+    assert report.bytes_moved == 0
+    assert report.hot_duplicates_removed == 1
+    assert ids[0] not in _hot_ids()
+
+
+def test_vacuum_failure_still_returns_report(monkeypatch, caplog):
+    _make_design(3)
+
+    class LockedEngine:
+        dialect = engine.dialect
+
+        def connect(self):
+            raise archive.OperationalError("VACUUM", {}, Exception("database is locked"))
+
+    # Sessions keep the real engine; only the VACUUM path sees the lock.
+    monkeypatch.setattr(archive, "engine", LockedEngine())
+    monkeypatch.setattr(archive, "_hot_db_bytes", lambda: None)
+
+    report = compact_versions(vacuum=True)
+
+    assert report.versions_archived == 1
+    assert "VACUUM" in caplog.text
@@ -0,0 +1,60 @@
+import json
+import time
+from collections import Counter
+
+import pytest
+
+from app.generator import generate_structured_design
+from app.llm_backends import _get_state
+
+SECTIONS = {
+    "Outline the services": {"services": [{"name": "orders", "responsibility": "manage orders"}]},
+    "database tables": {"tables": [{"name": "orders", "columns": [{"name": "id", "type": "INTEGER"}]}]},
+    "HTTP endpoints": {"endpoints": [{"method": "GET", "path": "/orders", "summary": "List orders"}]},
+    "sequence_steps": {"sequence_steps": [{"from_service": "orders", "to_service": "db", "message": "insert"}]},
+}
+
+
+def test_decomposed_retries_only_the_bad_section(stub_backends):
+    (backend,) = stub_backends("only")
+    calls: Counter[str] = Counter()
+
+    def reply(prompt: str) -> str:
+        section = next(key for key in SECTIONS if key in prompt)
+        calls[section] += 1
+        if calls[section] == 1:
+            return "not json"
+        return json.dumps(SECTIONS[section])
+
+    backend.reply = reply
+
+    design = generate_structured_design("Order service", decomposed=True)
+
+    assert [s.name for s in design.services] == ["orders"]
+    assert [t.name for t in design.tables] == ["orders"]
+    assert [e.path for e in design.endpoints] == ["/orders"]
+    assert [s.message for s in design.sequence_steps] == ["insert"]
+    assert all(count == 2 for count in calls.values())
+    assert _get_state("only").circuit_state() == "closed"
+
+
+def test_exhausted_section_cancels_siblings_without_failures(stub_backends):
+    (backend,) = stub_backends("only")
+
+    def reply(prompt: str) -> str:
+        section = next(key for key in SECTIONS if key in prompt)
+        if section == "database tables":
+            return "not json"
+        if section != "Outline the services":
+            time.sleep(1.0)
+        return json.dumps(SECTIONS[section])
+
+    backend.reply = reply
+
+    with pytest.raises(RuntimeError, match="for tables after retries"):
+        generate_structured_design("Order service", decomposed=True)
+
+    state = _get_state("only")
+    assert state.failures == 0
+    assert state.cancelled == 2
+    assert state.circuit_state() == "closed"
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.config import settings
+from app.generator import generate_structured_design
+from app.llm_backends import (
+    LATENCY_WINDOW,
+    BackendClients,
+    BackendState,
+    LLMBackendError,
+    NoBackendAvailable,
+    _get_state,
+    hedged_completion,
+)
+
+DESIGN = {
+    "services": [{"name": "api", "responsibility": "serve requests"}],
+    "tables": [{"name": "orders", "columns": [{"name": "id", "type": "INTEGER"}]}],
+    "endpoints": [{"method": "GET", "path": "/orders", "summary": "List orders"}],
+    "sequence_steps": [{"from_service": "api", "to_service": "db", "message": "query"}],
+}
+
+
+def _complete(parse=json.loads):
+    async def run():
+        async with BackendClients() as clients:
+            return await hedged_completion(clients, "design", "system", "user", parse)
+
+    return asyncio.run(run())
+
+
+def test_hedges_to_second_backend_and_cancels_loser(stub_backends):
+    slow, fast = stub_backends("slow", "fast")
+    slow.delay = 2.0
+    slow.reply = fast.reply = lambda prompt: '{"from": "stub"}'
+
+    started = time.monotonic()
+    assert _complete() == {"from": "stub"}
+    elapsed = time.monotonic() - started
+
+    assert settings.llm_hedge_default_delay_seconds <= elapsed < 1.0
+    assert _get_state("fast").wins == 1
+    assert _get_state("slow").cancelled == 1
+    assert _get_state("slow").circuit_state() == "closed"
+
+
+def test_fast_primary_is_not_hedged(stub_backends):
+    primary, secondary = stub_backends("primary", "secondary")
+
+    _complete()
+
+    assert primary.requests == 1
+    assert secondary.requests == 0
+
+
+def test_hedge_delay_adapts_to_latency_percentile(monkeypatch):
+    monkeypatch.setattr(settings, "llm_hedge_min_samples", 10)
+    state = BackendState("adaptive")
+    for _ in range(9):
+        state.record_success("design", 1.0)
+    assert state.hedge_delay("design") == settings.llm_hedge_default_delay_seconds
+
+    # Fill the rolling window so the early 1.0s samples drop out.
+    for latency in [0.1] * (LATENCY_WINDOW - 20) + [0.5] * 20:
+        state.record_success("design", latency)
+    assert state.hedge_delay("design") == pytest.approx(0.5)
+
+
+def test_hedge_delay_is_tracked_per_call_kind(monkeypatch):
+    monkeypatch.setattr(settings, "llm_hedge_min_samples", 10)
+    state = BackendState("mixed")
+    for _ in range(50):
+        state.record_success("service outline", 0.05)
+        state.record_success("tables", 2.0)
+
+    assert state.hedge_delay("service outline") == pytest.approx(0.05)
+    assert state.hedge_delay("tables") == pytest.approx(2.0)
+    assert state.hedge_delay("design") == settings.llm_hedge_default_delay_seconds
+    assert [stats.kind for stats in state.snapshot().latencies] == ["service outline", "tables"]
+
+
+def test_circuit_opens_half_opens_and_closes(stub_backends):
+    (flaky,) = stub_backends("flaky")
+    flaky.status = 500
+
+    for _ in range(settings.llm_circuit_failure_threshold):
+        with pytest.raises(LLMBackendError):
+            _complete()
+    assert _get_state("flaky").circuit_state() == "open"
+
+    requests_before = flaky.requests
+    with pytest.raises(NoBackendAvailable):
+        _complete()
+    assert flaky.requests == requests_before
+
+    time.sleep(settings.llm_circuit_reset_seconds)
+    assert _get_state("flaky").circuit_state() == "half_open"
+    with pytest.raises(LLMBackendError):
+        _complete()
+    assert _get_state("flaky").circuit_state() == "open"
+
+    time.sleep(settings.llm_circuit_reset_seconds)
+    flaky.status = 200
+    assert _complete() == {}
+    assert _get_state("flaky").circuit_state() == "closed"
+
+
+def test_invalid_output_does_not_open_circuit(stub_backends):
+    (backend,) = stub_backends("only")
+    backend.reply = lambda prompt: "not json"
+
+    with pytest.raises(RuntimeError, match="after retries"):
+        generate_structured_design("spec")
+    assert backend.requests == 3
+    assert _get_state("only").circuit_state() == "closed"
+    assert _get_state("only").invalid_outputs == 3
+
+    backend.reply = lambda prompt: json.dumps(DESIGN)
+    assert generate_structured_design("spec").services[0].name == "api"
+
+
+def test_invalid_output_fails_over_to_next_backend(stub_backends):
+    broken, healthy = stub_backends("broken", "healthy")
+    broken.reply = lambda prompt: "not json"
+    healthy.reply = lambda prompt: json.dumps(DESIGN)
+
+    assert generate_structured_design("spec").tables[0].name == "orders"
+    assert broken.requests == 1
+    assert healthy.requests == 1
+
+
+def test_client_errors_do_not_open_circuit(stub_backends):
+    (backend,) = stub_backends("strict")
+    backend.status = 400
+
+    for _ in range(settings.llm_circuit_failure_threshold + 1):
+        with pytest.raises(LLMBackendError, match="BadRequestError"):
+            _complete()
+
+    state = _get_state("strict")
+    assert state.circuit_state() == "closed"
+    assert state.failures == 0
+    assert state.rejected == settings.llm_circuit_failure_threshold + 1
+    assert backend.requests == settings.llm_circuit_failure_threshold + 1
+
+
+def test_failed_hedge_starts_next_backend_without_waiting(stub_backends):
+    slow, broken, fast = stub_backends("slow", "broken", "fast")
+    slow.delay = 2.0
+    broken.status = 500
+
+    started = time.monotonic()
+    assert _complete() == {}
+    elapsed = time.monotonic() - started
+
+    # The third backend starts when the hedge fails, not a hedge delay later.
+    assert elapsed < 2 * settings.llm_hedge_default_delay_seconds
+    assert _get_state("broken").failures == 1
+    assert _get_state("fast").wins == 1
@@ -0,0 +1,184 @@
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.archive import compact_versions
+from app.config import settings
+from app.database import SessionLocal
+from app.main import app
+from app.models import Design, DesignVersion
+from app.schemas import GeneratedArtifacts
+from app.timeline import TimelineCache, TimelineState
+
+VIEWER = "viewer"
+
+# services, endpoints, tables and risk codes for each version
+VERSIONS = [
+    (["api"], ["GET /orders"], ["orders"], ["missing-pagination"]),
+    (["api", "billing"], ["GET /orders", "POST /payments"], ["orders", "payments"], ["missing-pagination"]),
+    (["api", "billing"], ["POST /payments"], ["payments"], ["missing-idempotency"]),
+    (["api"], ["POST /payments"], ["payments", "refunds"], []),
+]
+
+
+def _output_json(services, apis, tables, risks) -> str:
+    return GeneratedArtifacts(
+        services=[{"name": name, "responsibility": name} for name in services],
+        tables=[{"name": name, "columns": []} for name in tables],
+        endpoints=[{"method": api.split()[0], "path": api.split()[1], "summary": api} for api in apis],
+        sequence_steps=[],
+        db_schema_sql="",
+        openapi_yaml="",
+        mermaid="",
+        risks=[{"code": code, "severity": "high", "message": code} for code in risks],
+    ).model_dump_json()
+
+
+@pytest.fixture
+def client(fresh_databases, monkeypatch):
+    monkeypatch.setattr(main, "timeline_cache", TimelineCache())
+    with TestClient(app) as test_client:
+        test_client.cookies.set(main.VIEWER_COOKIE_NAME, VIEWER)
+        yield test_client
+
+
+@pytest.fixture
+def decode_calls(monkeypatch):
+    calls = []
+    to_artifacts = main._to_artifacts
+
+    def counting(spec_text, output_json):
+        calls.append(output_json)
+        return to_artifacts(spec_text, output_json)
+
+    monkeypatch.setattr(main, "_to_artifacts", counting)
+    return calls
+
+
+def _add_versions(design_id: str, versions, start: int = 1, age_days: int = 0) -> None:
+    with SessionLocal() as db:
+        for offset, version in enumerate(versions):
+            num = start + offset
+            db.add(
+                DesignVersion(
+                    design_id=design_id,
+                    spec_text="spec",
+                    output_json=_output_json(*version),
+                    version_num=num,
+                    created_at=datetime.utcnow() - timedelta(days=age_days, minutes=len(VERSIONS) - num),
+                )
+            )
+        db.commit()
+
+
+def _make_design(versions, age_days: int = 0) -> str:
+    with SessionLocal() as db:
+        design = Design(owner_id=VIEWER)
+        db.add(design)
+        db.commit()
+        design_id = design.id
+    _add_versions(design_id, versions, age_days=age_days)
+    return design_id
+
+
+def _timeline(client, design_id: str) -> list[dict]:
+    response = client.get(f"/designs/{design_id}/timeline")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_cold_timeline_lists_summaries_and_adjacent_diffs(client, decode_calls):
+    design_id = _make_design(VERSIONS[:3])
+
+    entries = _timeline(client, design_id)
+
+    assert len(decode_calls) == 3
+    assert [e["version"]["version_num"] for e in entries] == [1, 2, 3]
+    assert entries[0]["diff"] is None
+    assert entries[1]["version"]["services"] == 2
+    assert entries[1]["version"]["risk_counts"] == {"high": 1}
+    assert entries[1]["diff"]["services_added"] == ["billing"]
+    assert entries[1]["diff"]["apis_added"] == ["POST /payments"]
+    assert entries[2]["diff"]["apis_removed"] == ["GET /orders"]
+    assert entries[2]["diff"]["tables_removed"] == ["orders"]
+    assert entries[2]["diff"]["risks_added"] == ["missing-idempotency"]
+    assert entries[2]["diff"]["risks_removed"] == ["missing-pagination"]
+
+
+def test_appended_version_only_decodes_the_new_version(client, decode_calls):
+    design_id = _make_design(VERSIONS[:3])
+    first = _timeline(client, design_id)
+    _add_versions(design_id, VERSIONS[3:], start=4)
+    decode_calls.clear()
+
+    second = _timeline(client, design_id)
+
+    assert len(decode_calls) == 1
+    assert second[:3] == first
+    # The diff crosses the cache boundary via the cached last signature.
+    assert second[3]["diff"]["services_removed"] == ["billing"]
+    assert second[3]["diff"]["tables_added"] == ["refunds"]
+    assert second[3]["diff"]["risks_removed"] == ["missing-idempotency"]
+
+
+def test_timeline_matches_pairwise_diff_endpoint(client):
+    design_id = _make_design(VERSIONS)
+    entries = _timeline(client, design_id)
+
+    for previous, current in zip(entries, entries[1:]):
+        response = client.get(
+            f"/design_versions/{current['version']['version_id']}/diff",
+            params={"other": previous["version"]["version_id"]},
+        )
+        assert response.json() == current["diff"]
+
+
+def test_abandoned_stream_is_not_cached(client):
+    rows = [
+        SimpleNamespace(
+            id=f"v{num}",
+            version_num=num,
+            created_at=datetime.utcnow(),
+            spec_text="spec",
+            output_json=_output_json(*version),
+        )
+        for num, version in enumerate(VERSIONS, start=1)
+    ]
+    stream = main._stream_timeline("design", TimelineState(), rows)
+    next(stream)
+    stream.close()
+
+    assert main.timeline_cache.get("design").last_version_num == 0
+
+
+def test_cache_keeps_the_newer_state():
+    cache = TimelineCache()
+    cache.put("design", TimelineState(lines=["a\n", "b\n"], last_version_num=2))
+    cache.put("design", TimelineState(lines=["a\n"], last_version_num=1))
+
+    assert cache.get("design").lines == ["a\n", "b\n"]
+
+
+def test_timeline_includes_compacted_versions(client, monkeypatch):
+    monkeypatch.setattr(settings, "archive_retention_days", 30)
+    monkeypatch.setattr(settings, "archive_keep_latest", 1)
+    design_id = _make_design(VERSIONS, age_days=100)
+    before = _timeline(client, design_id)
+
+    assert compact_versions().versions_archived == 3
+    monkeypatch.setattr(main, "timeline_cache", TimelineCache())
+
+    assert _timeline(client, design_id) == before
+    assert len(before) == 4
+
+
+def test_timeline_is_owner_scoped(client):
+    design_id = _make_design(VERSIONS[:1])
+    client.cookies.set(main.VIEWER_COOKIE_NAME, "someone-else")
+
+    assert client.get(f"/designs/{design_id}/timeline").status_code == 404
@@ -68,6 +68,8 @@ export type VersionListItem = {
   design_id: string;
   version_num: number;
   created_at: string;
+  pinned: boolean;
+  archived: boolean;
 };
 
 export type DesignListItem = {